@@ -0,0 +1,100 @@
+"""Content-keyed cache for near-deterministic (low temperature) LLM calls."""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from utils import json_utils
+
+logger = logging.getLogger(__name__)
+
+# Calls at or below this temperature are treated as deterministic
+MAX_CACHEABLE_TEMPERATURE = 0.1
+# Entries expire so a long session eventually sees fresh generations
+CACHE_TTL_SECONDS = 600.0
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with an optional time-to-live."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: tuple, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_CACHE = ResponseCache(ttl=CACHE_TTL_SECONDS)
+
+
+def make_key(kwargs: dict) -> tuple:
+    """Key a request on model, temperature and a digest of everything else."""
+    payload = json_utils.dumps({k: v for k, v in kwargs.items() if k not in ("model", "temperature")})
+    digest = hashlib.blake2b(payload.encode(), digest_size=16).digest()
+    return (kwargs.get("model"), kwargs.get("temperature"), digest)
+
+
+def _cacheable(kwargs: dict) -> bool:
+    return not kwargs.get("stream") and kwargs.get("temperature", 1.0) <= MAX_CACHEABLE_TEMPERATURE
+
+
+def lookup(kwargs: dict, namespace: str = ""):
+    """Return the cached value for a request, or None."""
+    if not _cacheable(kwargs):
+        return None
+    value = _CACHE.get((namespace,) + make_key(kwargs))
+    if value is not None:
+        logger.debug("LLM cache hit")
+    return value
+
+
+def store(kwargs: dict, value: Any, namespace: str = ""):
+    """Cache a value for a request; callers store only results they have validated."""
+    if _cacheable(kwargs):
+        _CACHE.set((namespace,) + make_key(kwargs), value)
+
+
+def cached_create(create, **kwargs):
+    """Call `create(**kwargs)`, serving repeat low-temperature requests from cache.
+
+    Responses cut off by max_tokens are returned but never cached.
+    """
+    response = lookup(kwargs)
+    if response is not None:
+        return response
+
+    response = create(**kwargs)
+    if all(choice.finish_reason != "length" for choice in response.choices):
+        store(kwargs, response)
+    return response
+
+
+def clear_cache():
+    """Drop all cached responses."""
+    _CACHE.clear()
@@ -1,42 +1,73 @@
 """Base Agent with Standard Function Calling for Foundry Local."""
 
-import json
+import asyncio
 import logging
 import re
-import uuid
-from typing import List, Dict, Any, Optional
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from secrets import token_hex
+from typing import List, Dict, Any, Optional, Set
+
+from agents._llm_cache import cached_create
+from utils import json_utils
 
 logger = logging.getLogger(__name__)
 
+_THINK_RE = re.compile(r"<think>.*?</think>\s*", re.DOTALL)
+_TOOLCALL_RE = re.compile(r"<tool_call>\s*(.*?)\s*</tool_call>", re.DOTALL)
+
+# (agent name, tool names) -> system message dict, shared across instances
+_SYSTEM_MSG_CACHE: Dict[tuple, Dict[str, str]] = {}
+
+
+class _Fn:
+    """Mimics the `function` attribute of an OpenAI tool_call."""
+
+    __slots__ = ("name", "arguments")
+
+    def __init__(self, name: str, arguments: str):
+        self.name = name
+        self.arguments = arguments
+
 
 class _TextToolCall:
     """Mimics OpenAI tool_call object for text-parsed tool calls."""
 
+    __slots__ = ("id", "function")
+
     def __init__(self, name: str, arguments: str):
-        self.id = f"call_{uuid.uuid4().hex[:8]}"
-        self.function = type("Fn", (), {"name": name, "arguments": arguments})()
+        self.id = f"call_{token_hex(4)}"
+        self.function = _Fn(name, arguments)
 
 
 def _strip_think_tags(content: str) -> str:
     """Remove <think>...</think> blocks from Qwen3 output."""
-    return re.sub(r"<think>.*?</think>\s*", "", content, flags=re.DOTALL).strip()
+    if "<think>" not in content:
+        return content.strip()
+    return _THINK_RE.sub("", content).strip()
 
 
-def _parse_text_tool_calls(content: str) -> list:
+def _parse_text_tool_calls(content: str, max_calls: Optional[int] = None) -> list:
     """Parse <tool_call>...</tool_call> tags from model output.
 
     Foundry intercepts these tags server-side for catalog models, but custom
     models pass them through as raw text. This does the same conversion
     client-side: extract the JSON, return objects matching the OpenAI format.
     """
-    blocks = re.findall(r"<tool_call>\s*(.*?)\s*</tool_call>", content, re.DOTALL)
+    if "<tool_call>" not in content:
+        return []
     calls = []
-    for block in blocks:
+    for match in _TOOLCALL_RE.finditer(content):
+        block = match.group(1).lstrip()
+        if not block.startswith("{"):
+            continue
         try:
-            data = json.loads(block)
-            calls.append(_TextToolCall(data["name"], json.dumps(data.get("arguments", {}))))
-        except (json.JSONDecodeError, KeyError):
+            data = json_utils.loads(block)
+            calls.append(_TextToolCall(data["name"], json_utils.dumps(data.get("arguments", {}))))
+        except (json_utils.JSONDecodeError, KeyError, TypeError):
             continue
+        if max_calls is not None and len(calls) >= max_calls:
+            break
     return calls
 
 
@@ -51,7 +82,11 @@ class BaseAgent:
         tools: Optional[List[Dict]] = None,
         available_tools: Optional[Dict] = None,
         max_tokens: int = 2048,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        max_parallel_tools: int = 8,
+        max_history_messages: int = 40,
+        extra_body: Optional[Dict[str, Any]] = None,
+        parallel_safe: Optional[Set[str]] = None
     ):
         self.name = name
         self.client = client
@@ -61,9 +96,20 @@ class BaseAgent:
         self.history: List[Dict[str, Any]] = []
         self.max_tokens = max_tokens
         self.temperature = temperature
-
-        tool_list = ", ".join(self.available_tools.keys()) or "None"
-        self.system_prompt = f"""You are {name}, an AI assistant with access to tools.
+        self.max_parallel_tools = max_parallel_tools
+        self.max_history_messages = max_history_messages
+        # Tools that may run concurrently within one hop; everything else runs
+        # in call order, since later calls can depend on earlier ones' effects
+        self.parallel_safe = frozenset(parallel_safe or ())
+        self._pool = ThreadPoolExecutor(max_workers=max_parallel_tools)
+        self.tool_batch_sizes: Counter = Counter()
+
+        # Agents with the same name and toolset share one system message
+        key = (name, tuple(self.available_tools.keys()))
+        self._system_dict = _SYSTEM_MSG_CACHE.get(key)
+        if self._system_dict is None:
+            tool_list = ", ".join(key[1]) or "None"
+            prompt = f"""You are {name}, an AI assistant with access to tools.
 
 Available tools: [{tool_list}]
 
@@ -72,75 +118,144 @@ Instructions:
 2. Wait for tool results before responding to the user
 3. Be concise and helpful
 /no_think"""
+            self._system_dict = _SYSTEM_MSG_CACHE[key] = {"role": "system", "content": prompt}
+        self.system_prompt = self._system_dict["content"]
+
+        # Request parameters are fixed for the agent's lifetime
+        self._base_kwargs: Dict[str, Any] = {
+            "model": model_id,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": False,
+        }
+        if tools:
+            self._base_kwargs["tools"] = tools
+            self._base_kwargs["tool_choice"] = "auto"
+        if extra_body:
+            self._base_kwargs["extra_body"] = extra_body
+        self._create = client.chat.completions.create
 
     def run(self, message: str) -> str:
         """Process user message through tool-calling loop."""
-        current_turn: List[Dict[str, Any]] = [{"role": "user", "content": message}]
-        messages = [{"role": "system", "content": self.system_prompt}] + self.history + current_turn
+        messages, start_idx = self._start_turn(message)
 
         response = self._call_model(messages)
         response_msg = response.choices[0].message
-        tool_calls = response_msg.tool_calls
-        if not tool_calls and response_msg.content:
-            tool_calls = _parse_text_tool_calls(response_msg.content) or None
+        tool_calls = self._get_tool_calls(response_msg)
 
         while tool_calls:
             logger.info(f"[{self.name}] Executing {len(tool_calls)} tool call(s)...")
+            self._record_batch_size(len(tool_calls))
 
             # Add assistant message with tool calls
-            assistant_msg = {
-                "role": "assistant",
-                "content": None,
-                "tool_calls": [
-                    {
-                        "id": tc.id,
-                        "type": "function",
-                        "function": {"name": tc.function.name, "arguments": tc.function.arguments}
-                    }
-                    for tc in tool_calls
-                ]
-            }
+            assistant_msg = self._assistant_tool_msg(tool_calls)
             messages.append(assistant_msg)
-            current_turn.append(assistant_msg)
 
-            # Execute tools
-            for tc in tool_calls:
-                tool_result = self._execute_tool(tc)
-                messages.append(tool_result)
-                current_turn.append(tool_result)
+            # Fan out only when every call is parallel-safe; results keep call order
+            if self._can_parallelize(tool_calls):
+                futures = [self._pool.submit(self._execute_tool, tc) for tc in tool_calls]
+                messages.extend([f.result() for f in futures])
+            else:
+                messages.extend([self._execute_tool(tc) for tc in tool_calls])
 
             # Call model again
             response = self._call_model(messages)
             response_msg = response.choices[0].message
-            tool_calls = response_msg.tool_calls
-            if not tool_calls and response_msg.content:
-                tool_calls = _parse_text_tool_calls(response_msg.content) or None
+            tool_calls = self._get_tool_calls(response_msg)
 
         final_content = _strip_think_tags(response_msg.content) if response_msg.content else "Task completed."
-        current_turn.append({"role": "assistant", "content": final_content})
-        self.history.extend(current_turn)
+        messages.append({"role": "assistant", "content": final_content})
+        self.history.extend(messages[start_idx:])
+        self._trim_history()
 
         return final_content
 
-    def _call_model(self, messages: List[Dict]):
-        """Make API call to model."""
-        kwargs = {
-            "model": self.model_id,
-            "messages": messages,
-            "temperature": self.temperature,
-            "max_tokens": self.max_tokens,
-            "stream": False,
+    async def arun(self, message: str) -> str:
+        """Async variant of run() - model and tool calls run off the event loop."""
+        messages, start_idx = self._start_turn(message)
+
+        response = await asyncio.to_thread(self._call_model, messages)
+        response_msg = response.choices[0].message
+        tool_calls = self._get_tool_calls(response_msg)
+
+        while tool_calls:
+            logger.info(f"[{self.name}] Executing {len(tool_calls)} tool call(s)...")
+            self._record_batch_size(len(tool_calls))
+
+            assistant_msg = self._assistant_tool_msg(tool_calls)
+            messages.append(assistant_msg)
+
+            if self._can_parallelize(tool_calls):
+                results = await asyncio.gather(
+                    *[asyncio.to_thread(self._execute_tool, tc) for tc in tool_calls]
+                )
+                messages.extend(results)
+            else:
+                for tc in tool_calls:
+                    messages.append(await asyncio.to_thread(self._execute_tool, tc))
+
+            response = await asyncio.to_thread(self._call_model, messages)
+            response_msg = response.choices[0].message
+            tool_calls = self._get_tool_calls(response_msg)
+
+        final_content = _strip_think_tags(response_msg.content) if response_msg.content else "Task completed."
+        messages.append({"role": "assistant", "content": final_content})
+        self.history.extend(messages[start_idx:])
+        self._trim_history()
+
+        return final_content
+
+    def _can_parallelize(self, tool_calls: list) -> bool:
+        """True if this hop has several calls and all of them are parallel-safe."""
+        return len(tool_calls) > 1 and all(tc.function.name in self.parallel_safe for tc in tool_calls)
+
+    def _record_batch_size(self, n: int):
+        """Track how many tool calls each hop requests (for tuning the fast path)."""
+        self.tool_batch_sizes[n] += 1
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[{self.name}] Tool batch sizes so far: {dict(self.tool_batch_sizes)}")
+
+    def _start_turn(self, message: str):
+        """Build this turn's message list; returns it with the index of the user message.
+
+        A fresh list per turn, so overlapping run()/arun() calls never share it.
+        """
+        messages = [self._system_dict, *self.history]
+        start_idx = len(messages)
+        messages.append({"role": "user", "content": message})
+        return messages, start_idx
+
+    def _get_tool_calls(self, response_msg) -> Optional[list]:
+        """Return native tool calls, falling back to text-parsed ones."""
+        tool_calls = response_msg.tool_calls
+        if not tool_calls and response_msg.content:
+            tool_calls = _parse_text_tool_calls(response_msg.content, self.max_parallel_tools) or None
+        return tool_calls
+
+    @staticmethod
+    def _assistant_tool_msg(tool_calls: list) -> Dict[str, Any]:
+        """Build the assistant message that records the requested tool calls."""
+        return {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": tc.id,
+                    "type": "function",
+                    "function": {"name": tc.function.name, "arguments": tc.function.arguments}
+                }
+                for tc in tool_calls
+            ]
         }
-        if self.tools:
-            kwargs["tools"] = self.tools
-            kwargs["tool_choice"] = "auto"
 
-        return self.client.chat.completions.create(**kwargs)
+    def _call_model(self, messages: List[Dict]):
+        """Make API call to model."""
+        return cached_create(self._create, messages=messages, **self._base_kwargs)
 
     def _execute_tool(self, tool_call) -> Dict[str, Any]:
         """Execute tool and return result message."""
         func_name = tool_call.function.name
-        args = json.loads(tool_call.function.arguments)
+        args = json_utils.loads(tool_call.function.arguments)
 
         # Log the call
         print(f"  🔧 Calling: {func_name}({args})")
@@ -151,16 +266,27 @@ Instructions:
         else:
             result = f"Error: Tool '{func_name}' not found."
 
-        if not isinstance(result, str):
-            result = json.dumps(result)
-
         return {
             "role": "tool",
             "name": func_name,
             "tool_call_id": tool_call.id,
-            "content": result
+            "content": json_utils.to_str(result)
         }
 
+    def _trim_history(self):
+        """Drop the oldest turns once history exceeds max_history_messages.
+
+        Cuts only at user-message boundaries so tool calls are never separated
+        from their results.
+        """
+        excess = len(self.history) - self.max_history_messages
+        if excess <= 0:
+            return
+        user_idxs = [i for i, m in enumerate(self.history) if m.get("role") == "user"]
+        cut = next((i for i in user_idxs if i >= excess), user_idxs[-1] if user_idxs else 0)
+        if cut:
+            self.history = self.history[cut:]
+
     def clear_history(self):
         """Clear conversation history."""
         self.history = []
@@ -1,11 +1,49 @@
 """Quiz Generator Agent - Generates quiz questions in JSON format."""
 
-import json
+import asyncio
+import copy
 import logging
+from typing import Callable, List, Optional, Tuple
+
+from agents._llm_cache import lookup, store
+from agents.base_agent import _strip_think_tags
+from utils import json_utils
+from utils.schemas import validate_quiz
 
 logger = logging.getLogger(__name__)
 
 
+class _JsonObjectEnd:
+    """Incrementally detects when the first top-level JSON object closes."""
+
+    __slots__ = ("depth", "in_string", "escape")
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+
+    def feed(self, text: str) -> bool:
+        """Consume text; return True once the outer object is complete."""
+        for ch in text:
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = self.depth > 0
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}" and self.depth:
+                self.depth -= 1
+                if not self.depth:
+                    return True
+        return False
+
+
 class QuizGeneratorAgent:
     """Generates quiz questions on a given topic."""
     
@@ -31,32 +69,102 @@ Rules:
 2. Each question must have exactly 4 options (A, B, C, D)
 3. The "correct" field must be a single letter (A, B, C, or D)
 """
+        self._system_dict = {"role": "system", "content": self.system_prompt}
 
-    def generate(self, topic: str, num_questions: int = 5) -> dict:
-        """Generate a quiz on the given topic."""
+    def generate(self, topic: str, num_questions: int = 5,
+                 on_progress: Optional[Callable[[int], None]] = None,
+                 use_cache: bool = True) -> dict:
+        """Generate a quiz on the given topic.
+
+        on_progress, if given, is called with the number of characters
+        received so far as the response streams in. use_cache=False always
+        asks the model for a fresh quiz (the result still refreshes the cache).
+        The returned dict is the caller's own copy.
+        """
         logger.info(f"[QuizGenerator] Generating {num_questions} questions about '{topic}'...")
         
-        response = self.client.chat.completions.create(
-            model=self.model_id,
-            messages=[
-                {"role": "system", "content": self.system_prompt},
+        request = {
+            "model": self.model_id,
+            "messages": [
+                self._system_dict,
                 {"role": "user", "content": f"Create a quiz about '{topic}' with exactly {num_questions} questions."}
             ],
-            temperature=0.1,
-            max_tokens=2048
-        )
-        
-        content = response.choices[0].message.content.strip()
+            "temperature": 0.1,
+            "max_tokens": 2048,
+        }
+        if use_cache:
+            quiz_data = lookup(request, namespace="quiz")
+            if quiz_data is not None:
+                return copy.deepcopy(quiz_data)
+
+        content, finish_reason = self._stream_content(on_progress, **request)
+        content = content.strip()
 
         # Remove Qwen3 <think> blocks if present
-        import re
-        content = re.sub(r"<think>.*?</think>\s*", "", content, flags=re.DOTALL).strip()
+        content = _strip_think_tags(content)
 
-        # Remove markdown code fences if present
-        if "```" in content:
-            content = content.split("```json")[-1] if "```json" in content else content.split("```")[-1]
-            content = content.split("```")[0].strip()
+        # Keep only the outer JSON object (drops markdown fences and stray prose)
+        start, end = content.find("{"), content.rfind("}")
+        if start != -1 and end > start:
+            content = content[start:end + 1]
         
-        quiz_data = json.loads(content)
+        quiz_data = json_utils.loads(content)
+        validate_quiz(quiz_data)
+        # Only a complete, valid quiz is cached, so a bad generation is retried
+        if finish_reason != "length":
+            store(request, copy.deepcopy(quiz_data), namespace="quiz")
         logger.info(f"[QuizGenerator] Successfully generated {len(quiz_data['questions'])} questions")
-        return quiz_data
\ No newline at end of file
+        return quiz_data
+
+    def _stream_content(self, on_progress=None, **request) -> Tuple[str, Optional[str]]:
+        """Stream a completion, stopping as soon as the quiz JSON object closes.
+
+        Returns the text and the finish_reason reported by the server (None
+        if we stopped the stream ourselves).
+        """
+        stream = self.client.chat.completions.create(stream=True, **request)
+        parts = []
+        received = 0
+        finish_reason = None
+        scanner = _JsonObjectEnd()
+        head = ""  # text held back until we know whether a <think> block leads
+        in_think = None
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content or ""
+            finish_reason = chunk.choices[0].finish_reason or finish_reason
+            parts.append(delta)
+            if on_progress:
+                received += len(delta)
+                on_progress(received)
+
+            if in_think is not False:
+                head += delta
+                stripped = head.lstrip()
+                if in_think is None:
+                    if "<think>".startswith(stripped):
+                        continue
+                    in_think = stripped.startswith("<think>")
+                if in_think:
+                    if "</think>" not in head:
+                        continue
+                    head = head.split("</think>", 1)[1]
+                in_think = False
+                delta, head = head, ""
+
+            if scanner.feed(delta):
+                stream.close()
+                break
+        return "".join(parts), finish_reason
+
+    async def generate_many(self, topics: List[str], num_questions: int = 5,
+                            max_concurrency: int = 16) -> List[dict]:
+        """Generate quizzes for several topics concurrently, in topic order."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _generate(topic: str) -> dict:
+            async with semaphore:
+                return await asyncio.to_thread(self.generate, topic, num_questions)
+
+        return await asyncio.gather(*[_generate(t) for t in topics])
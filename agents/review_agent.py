@@ -1,6 +1,9 @@
 """Review Agent - Reviews quiz results and helps users learn."""
 
 import logging
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.schemas import Quiz
 
 logger = logging.getLogger(__name__)
 
@@ -8,10 +11,11 @@ logger = logging.getLogger(__name__)
 class ReviewAgent:
     """Reviews quiz results and provides educational feedback."""
     
-    def __init__(self, client, model_id: str, quiz_data: dict, user_responses: dict):
+    def __init__(self, client, model_id: str, quiz_data: Quiz, user_responses: dict,
+                 extra_body: Optional[Dict[str, Any]] = None):
         self.client = client
         self.model_id = model_id
-        self.history = []
+        self.extra_body = extra_body
         
         context = self._format_context(quiz_data, user_responses)
         self.system_prompt = f"""You are a helpful Quiz Review Tutor.
@@ -25,38 +29,80 @@ class ReviewAgent:
 3. Be encouraging and educational
 4. Answer follow-up questions about the topic
 """
+        # Only ever appended to, so the quiz context stays a byte-stable prefix
+        # the server can reuse across follow-up turns.
+        self.messages: List[Dict[str, Any]] = [{"role": "system", "content": self.system_prompt}]
 
-    def _format_context(self, quiz_data: dict, user_responses: dict) -> str:
+    def _format_context(self, quiz_data: Quiz, user_responses: dict) -> str:
         """Format quiz data and user responses into context string."""
-        lines = [f"Topic: {quiz_data.get('topic', 'Unknown')}"]
+        lines = [f"Topic: {quiz_data.topic or 'Unknown'}"]
         
-        questions = quiz_data.get('questions', [])
-        user_answers = {ans['question_id']: ans['selected_option'] for ans in user_responses.get('answers', [])}
+        questions = quiz_data.questions
+        # Question ids are 1..N, so index answers by position instead of hashing
+        n = len(questions)
+        user_answers = [None] * n
+        for ans in user_responses.get('answers', []):
+            idx = ans['question_id'] - 1
+            if 0 <= idx < n:
+                user_answers[idx] = ans['selected_option']
         
         for i, q in enumerate(questions, 1):
-            user_ans = user_answers.get(i, "No answer")
-            is_correct = user_ans.startswith(q['correct']) if user_ans != "No answer" else False
+            user_ans = user_answers[i - 1]
+            if user_ans is None:
+                user_ans, is_correct = "No answer", False
+            else:
+                is_correct = user_ans.startswith(q.correct)
             status = "✓" if is_correct else "✗"
             
-            lines.append(f"\nQ{i}: {q['question']}")
-            lines.append(f"Options: {', '.join(q['options'])}")
-            lines.append(f"Correct: {q['correct']} | User: {user_ans} {status}")
+            lines.append(
+                f"\nQ{i}: {q.question}\n"
+                f"Options: {', '.join(q.options)}\n"
+                f"Correct: {q.correct} | User: {user_ans} {status}"
+            )
         
         return "\n".join(lines)
 
     def run(self, message: str) -> str:
         """Process user message and return response."""
-        self.history.append({"role": "user", "content": message})
-        
-        messages = [{"role": "system", "content": self.system_prompt}] + self.history
+        self.messages.append({"role": "user", "content": message})
         
         response = self.client.chat.completions.create(
             model=self.model_id,
-            messages=messages,
+            messages=self.messages,
             temperature=0.3,
-            max_tokens=2048
+            max_tokens=2048,
+            extra_body=self.extra_body
         )
         
         content = response.choices[0].message.content
-        self.history.append({"role": "assistant", "content": content})
-        return content
\ No newline at end of file
+        self.messages.append({"role": "assistant", "content": content})
+        return content
+
+    def run_stream(self, message: str) -> Iterator[str]:
+        """Like run(), but yields the response text as it streams in."""
+        self.messages.append({"role": "user", "content": message})
+        
+        parts = []
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model_id,
+                messages=self.messages,
+                temperature=0.3,
+                max_tokens=2048,
+                extra_body=self.extra_body,
+                stream=True
+            )
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        finally:
+            # Keep the history alternating even if the stream fails or the
+            # consumer stops early: keep what arrived, or drop the question.
+            if parts:
+                self.messages.append({"role": "assistant", "content": "".join(parts)})
+            else:
+                self.messages.pop()
@@ -1,14 +1,27 @@
 #!/usr/bin/env python3
 """Quiz App - Multi-Agent Orchestrator with Function Calling."""
 
+import argparse
+import importlib
 import logging
+from utils import foundry_client
 from utils.foundry_client import get_client
 from agents.base_agent import BaseAgent
-from tools.generator_tools import generate_new_quiz
-from tools.interface_tools import launch_quiz_interface
-from tools.review_tools import review_quiz_interface
+
+try:
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.history import FileHistory
+    PROMPT_TOOLKIT_AVAILABLE = True
+except ImportError:
+    PROMPT_TOOLKIT_AVAILABLE = False
+
+HISTORY_FILE = ".quiz_history"
 
 # Configure logging
+# Only %(message)s is printed, so skip collecting thread/process info per record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("gradio").setLevel(logging.WARNING)
@@ -18,7 +31,7 @@ TOOLS_SCHEMA = [
         "type": "function",
         "function": {
             "name": "generate_new_quiz",
-            "description": "Creates a new quiz on a topic. Use when user wants to create/generate a quiz.",
+            "description": "Create a new quiz on a topic.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -33,11 +46,11 @@ TOOLS_SCHEMA = [
         "type": "function",
         "function": {
             "name": "launch_quiz_interface",
-            "description": "Opens quiz interface for user to take the quiz.",
+            "description": "Open the quiz for the user to take.",
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "topic": {"type": "string", "description": "The quiz topic to load"}
+                    "topic": {"type": "string", "description": "The quiz topic"}
                 },
                 "required": ["topic"]
             }
@@ -47,11 +60,11 @@ TOOLS_SCHEMA = [
         "type": "function",
         "function": {
             "name": "review_quiz_interface",
-            "description": "Opens chat interface to review quiz results. Use when user asks to review/grade their quiz.",
+            "description": "Open a chat to review/grade quiz results.",
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "topic": {"type": "string", "description": "The quiz topic to review"}
+                    "topic": {"type": "string", "description": "The quiz topic"}
                 },
                 "required": ["topic"]
             }
@@ -59,14 +72,29 @@ TOOLS_SCHEMA = [
     }
 ]
 
+
+def _lazy_tool(module_name: str, func_name: str):
+    """Defer importing a tool's module (and Gradio) until it is first called."""
+    def call(**kwargs):
+        return getattr(importlib.import_module(module_name), func_name)(**kwargs)
+    call.__name__ = func_name
+    return call
+
+
 AVAILABLE_TOOLS = {
-    "generate_new_quiz": generate_new_quiz,
-    "launch_quiz_interface": launch_quiz_interface,
-    "review_quiz_interface": review_quiz_interface
+    "generate_new_quiz": _lazy_tool("tools.generator_tools", "generate_new_quiz"),
+    "launch_quiz_interface": _lazy_tool("tools.interface_tools", "launch_quiz_interface"),
+    "review_quiz_interface": _lazy_tool("tools.review_tools", "review_quiz_interface")
 }
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Quiz App - Multi-Agent Orchestrator")
+    parser.add_argument("--kv-reuse", action="store_true",
+                        help="Request prompt-prefix KV cache reuse from the server")
+    args = parser.parse_args()
+    foundry_client.kv_reuse_enabled = args.kv_reuse
+
     print("\n" + "=" * 50)
     print("🎓 Quiz App - Multi-Agent Orchestrator")
     print("=" * 50)
@@ -90,11 +118,18 @@ def main():
         client=client,
         model_id=model_id,
         tools=TOOLS_SCHEMA,
-        available_tools=AVAILABLE_TOOLS
+        available_tools=AVAILABLE_TOOLS,
+        extra_body=foundry_client.request_extra_body()
     )
     
+    # prompt_toolkit adds line editing and persistent input history
+    if PROMPT_TOOLKIT_AVAILABLE:
+        read_input = PromptSession(history=FileHistory(HISTORY_FILE)).prompt
+    else:
+        read_input = input
+    
     while True:
-        user_input = input("👤 You: ").strip()
+        user_input = read_input("👤 You: ").strip()
         
         if user_input.lower() in ["quit", "exit", "q"]:
             print("\n👋 Goodbye!")
@@ -1,22 +1,40 @@
 """Optimize Qwen3 0.6B to INT4 ONNX using Microsoft Olive.
 
 Usage:
-    python scripts/optimize_model.py
+    python scripts/optimize_model.py [--quant-scheme {rtn,awq,gptq,nf4,fp4}] [--subprocess]
 
-Downloads the model from HuggingFace, converts to ONNX, and quantizes
-to INT4 using the ONNX Runtime GenAI model builder.
+Downloads the model from HuggingFace, quantizes the weights to 4 bits and
+converts to ONNX for ONNX Runtime GenAI. Schemes:
+
+    rtn   round-to-nearest INT4 in the model builder
+    awq   activation-aware INT4 (default; salient channels keep precision)
+    gptq  second-order INT4 via GPTQ calibration
+    nf4   bitsandbytes NormalFloat4 (OnnxBnb4Quantization)
+    fp4   bitsandbytes FP4 (OnnxBnb4Quantization)
+
+Activations stay in floating point for all schemes.
 
 Output: models/qwen3-0.6b-int4/
 
-Requirements: pip install olive-ai onnxruntime-genai transformers
+Requirements: pip install olive-ai[auto-opt] onnxruntime-genai transformers
+    (plus autoawq for awq, auto-gptq/optimum for gptq)
 """
 
+import argparse
+import json
+import os
 import subprocess
 import sys
+import tempfile
+import traceback
 from pathlib import Path
 
 MODEL_ID = "Qwen/Qwen3-0.6B"
 OUTPUT_DIR = "models/qwen3-0.6b-int4"
+QUANT_SCHEMES = ["rtn", "awq", "gptq", "nf4", "fp4"]
+
+# Set from --subprocess; run Olive in a child interpreter instead of in-process
+USE_SUBPROCESS = False
 
 
 def ensure_model_local():
@@ -33,22 +51,70 @@ def ensure_model_local():
     return local_path
 
 
-def main():
-    output = Path(OUTPUT_DIR)
-    if output.exists() and any(output.rglob("*.onnx")):
-        print(f"Model already exists at {OUTPUT_DIR}")
-        print("Delete the directory to re-optimize.")
-        return
+def _call_in_process(func, *args):
+    """Call an Olive entry point, mapping SystemExit/exceptions to an exit code."""
+    try:
+        func(*args)
+        return 0
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception:
+        traceback.print_exc()
+        return 1
 
-    print(f"Optimizing {MODEL_ID} -> INT4 ONNX")
-    print(f"Output: {OUTPUT_DIR}\n")
 
-    local_path = ensure_model_local()
+def _check_step(returncode, step):
+    """Exit with a message if an Olive step failed."""
+    if returncode != 0:
+        print(f"\n{step[:1].upper() + step[1:]} failed with exit code {returncode}")
+        sys.exit(1)
+
+
+def run_olive(args, step):
+    """Run an Olive CLI command, exiting on failure.
+
+    Runs in-process by default so torch/transformers/onnxruntime are imported
+    once; --subprocess isolates each step in a fresh interpreter instead.
+    """
+    print(f"Running Olive {step}...\n")
+    if USE_SUBPROCESS:
+        returncode = subprocess.run([sys.executable, "-m", "olive", *args]).returncode
+    else:
+        from olive.cli.launcher import main as olive_main
+        returncode = _call_in_process(olive_main, args)
+    _check_step(returncode, step)
+
 
+def quantize_hf(local_path, algorithm):
+    """Quantize HF weights to INT4 with awq/gptq; returns the quantized model path."""
+    quant_dir = Path("models") / f"hf-{algorithm}" / MODEL_ID.split("/")[-1]
     cmd = [
-        sys.executable, "-m", "olive", "auto-opt",
+        "quantize",
         "--model_name_or_path", local_path,
         "--trust_remote_code",
+        "--algorithm", algorithm,
+        "--precision", "int4",
+        "--output_path", str(quant_dir),
+        "--log_level", "1",
+    ]
+    run_olive(cmd, f"{algorithm.upper()} quantization")
+
+    # Olive may write the model directly or into a model/ subfolder
+    if (quant_dir / "model").is_dir():
+        quant_dir = quant_dir / "model"
+    return str(quant_dir)
+
+
+def build_int4(model_path):
+    """Convert to ONNX with the model builder, packing weights into MatMulNBits.
+
+    For AWQ/GPTQ checkpoints the builder reuses the precomputed scales;
+    for a plain checkpoint it falls back to round-to-nearest.
+    """
+    cmd = [
+        "auto-opt",
+        "--model_name_or_path", model_path,
+        "--trust_remote_code",
         "--output_path", OUTPUT_DIR,
         "--device", "cpu",
         "--provider", "CPUExecutionProvider",
@@ -57,13 +123,81 @@ def main():
         "--use_ort_genai",
         "--log_level", "1",
     ]
+    run_olive(cmd, "optimization")
+
+
+def build_bnb4(model_path, quant_type):
+    """Convert to FP32 ONNX, then quantize weights with bitsandbytes nf4/fp4."""
+    config = {
+        "input_model": {
+            "type": "HfModel",
+            "model_path": model_path,
+            "load_kwargs": {"trust_remote_code": True},
+        },
+        "systems": {
+            "local_system": {
+                "type": "LocalSystem",
+                "accelerators": [{"device": "cpu", "execution_providers": ["CPUExecutionProvider"]}],
+            }
+        },
+        "passes": {
+            "builder": {"type": "ModelBuilder", "precision": "fp32"},
+            "bnb4": {
+                "type": "OnnxBnb4Quantization",
+                "quant_type": quant_type,
+                "save_as_external_data": True,
+                "all_tensors_to_one_file": True,
+            },
+        },
+        "host": "local_system",
+        "target": "local_system",
+        "output_dir": OUTPUT_DIR,
+        "log_severity_level": 1,
+    }
+    step = f"{quant_type} quantization"
+    if not USE_SUBPROCESS:
+        from olive.workflows import run as olive_run
+
+        print(f"Running Olive {step}...\n")
+        _check_step(_call_in_process(olive_run, config), step)
+        return
 
-    print(f"Running Olive optimization...\n")
-    result = subprocess.run(cmd)
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(config, f, indent=2)
+    try:
+        run_olive(["run", "--config", f.name], step)
+    finally:
+        os.remove(f.name)
 
-    if result.returncode != 0:
-        print(f"\nOptimization failed with exit code {result.returncode}")
-        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimize Qwen3 0.6B to 4-bit ONNX")
+    parser.add_argument("--quant-scheme", choices=QUANT_SCHEMES, default="awq",
+                        help="Weight quantization scheme (default: awq)")
+    parser.add_argument("--subprocess", action="store_true",
+                        help="Run each Olive step in a separate interpreter")
+    args = parser.parse_args()
+
+    global USE_SUBPROCESS
+    USE_SUBPROCESS = args.subprocess
+
+    output = Path(OUTPUT_DIR)
+    if output.exists() and any(output.rglob("*.onnx")):
+        print(f"Model already exists at {OUTPUT_DIR}")
+        print("Delete the directory to re-optimize.")
+        return
+
+    print(f"Optimizing {MODEL_ID} -> 4-bit ({args.quant_scheme}) ONNX")
+    print(f"Output: {OUTPUT_DIR}\n")
+
+    local_path = ensure_model_local()
+
+    if args.quant_scheme in ("nf4", "fp4"):
+        build_bnb4(local_path, args.quant_scheme)
+    elif args.quant_scheme in ("awq", "gptq"):
+        build_int4(quantize_hf(local_path, args.quant_scheme))
+    else:
+        build_int4(local_path)
 
     print("\nOptimization complete! Output files:")
     for f in sorted(output.rglob("*")):
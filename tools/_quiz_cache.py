@@ -0,0 +1,30 @@
+"""Memoized loading of quiz/result JSON files, invalidated on modification."""
+
+import functools
+from pathlib import Path
+
+from utils import json_utils
+from utils.schemas import Quiz, decode_quiz
+
+
+@functools.lru_cache(maxsize=32)
+def _load_json(path_str: str, mtime_ns: int):
+    return json_utils.load_file(path_str)
+
+
+@functools.lru_cache(maxsize=32)
+def _load_quiz(path_str: str, mtime_ns: int) -> Quiz:
+    return decode_quiz(Path(path_str).read_bytes())
+
+
+def load_json(path: Path):
+    """Load a JSON file, reusing the parsed data while the file is unchanged.
+
+    Callers share the returned object and must not mutate it.
+    """
+    return _load_json(str(path), path.stat().st_mtime_ns)
+
+
+def load_quiz(path: Path) -> Quiz:
+    """Load and validate a quiz file, cached the same way as load_json()."""
+    return _load_quiz(str(path), path.stat().st_mtime_ns)
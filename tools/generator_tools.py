@@ -1,16 +1,22 @@
 """Tools for creating quizzes."""
 
-import json
 import logging
-from pathlib import Path
+
+from utils import json_utils
+from utils.paths import ensure_data_dirs, quiz_paths
+from utils.schemas import QuizError
 
 logger = logging.getLogger(__name__)
 
-DATA_DIR = Path("data/quizzes")
-DATA_DIR.mkdir(parents=True, exist_ok=True)
+_SPINNER = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+
+
+def _show_progress(received: int):
+    """Redraw a one-line spinner with the number of characters streamed."""
+    print(f"\r  {_SPINNER[received % len(_SPINNER)]} Generating quiz... {received} chars", end="", flush=True)
 
 
-def generate_new_quiz(topic: str, num_questions: int = 3, **kwargs) -> str:
+def generate_new_quiz(topic: str, num_questions: int = 3, **kwargs) -> dict:
     """Generate a new quiz on the given topic."""
     from utils.foundry_client import get_client
     from agents.quiz_generator import QuizGeneratorAgent
@@ -19,13 +25,22 @@ def generate_new_quiz(topic: str, num_questions: int = 3, **kwargs) -> str:
     
     client, model_id = get_client()
     generator = QuizGeneratorAgent(client, model_id)
-    quiz_data = generator.generate(topic, num_questions=num_questions)
+    try:
+        # generate() validates against the quiz schema, so only usable quizzes
+        # are saved; skip the cache since the user asked for a new quiz
+        quiz_data = generator.generate(topic, num_questions=num_questions,
+                                       on_progress=_show_progress, use_cache=False)
+    except (json_utils.JSONDecodeError, QuizError) as e:
+        logger.error(f"[Tool: generate_new_quiz] Model returned an invalid quiz: {e}")
+        return {"ok": False, "error": f"The generated quiz was malformed ({e}). Please try again."}
+    finally:
+        print("\r\033[K", end="", flush=True)
     
-    filename = f"{topic.replace(' ', '_').lower()}_quiz.json"
-    filepath = DATA_DIR / filename
+    filepath, _ = quiz_paths(topic)
+    filename = filepath.name
+    ensure_data_dirs()
     
-    with open(filepath, "w") as f:
-        json.dump(quiz_data, f, indent=2)
+    json_utils.dump_file(quiz_data, filepath)
     
     logger.info(f"[Tool: generate_new_quiz] Quiz saved to: {filepath}")
-    return f"Success! Generated a quiz on '{topic}' with {len(quiz_data['questions'])} questions. Saved as '{filename}'."
\ No newline at end of file
+    return {"ok": True, "topic": topic, "n": len(quiz_data['questions']), "file": filename}
\ No newline at end of file
@@ -1,54 +1,125 @@
 """Tools for launching quiz interface."""
 
-import json
+import asyncio
 import logging
-from pathlib import Path
-import gradio as gr
+import re
+import threading
+from typing import Optional
+
+from tools._quiz_cache import load_quiz
+from utils import json_utils
+from utils.paths import ensure_data_dirs, quiz_paths
+from utils.schemas import QuizError
 
 logger = logging.getLogger(__name__)
 
-QUIZ_DIR = Path("data/quizzes")
-RESPONSE_DIR = Path("data/responses")
-RESPONSE_DIR.mkdir(parents=True, exist_ok=True)
 
+_OPTION_LABEL = re.compile(r"^\(?[A-Za-z]\s*[).:]\s*")
+
+
+def _match_option(answer, options: list) -> Optional[str]:
+    """Map a typed answer ("b", "B)", "(c)", "Paris", "A) Paris") to the full option.
+
+    Returns None when the answer matches no option.
+    """
+    answer = str(answer or "").strip()
+    letter = answer.strip("()[].:) ")
+    if len(letter) == 1 and letter.isalpha():
+        # Options are listed in A, B, C, D order
+        idx = ord(letter.upper()) - ord("A")
+        return options[idx] if 0 <= idx < len(options) else None
+    text = _OPTION_LABEL.sub("", answer).casefold()
+    for option in options:
+        if option.casefold() == answer.casefold() or _OPTION_LABEL.sub("", option).casefold() == text:
+            return option
+    return None
 
-def launch_quiz_interface(topic: str) -> str:
+
+def launch_quiz_interface(topic: str) -> dict:
     """Launch graphical quiz interface."""
-    clean_topic = topic.replace(' ', '_').lower()
-    filepath = QUIZ_DIR / f"{clean_topic}_quiz.json"
+    import gradio as gr
+    
+    filepath, output_path = quiz_paths(topic)
     
     if not filepath.exists():
-        return f"Error: Quiz file not found. Please generate the quiz first."
+        return {"ok": False, "error": "Quiz file not found. Please generate the quiz first."}
     
     logger.info(f"[Tool: launch_quiz_interface] Loading quiz from {filepath}")
     
-    with open(filepath, 'r') as f:
-        quiz_data = json.load(f)
+    try:
+        quiz_data = load_quiz(filepath)
+    except QuizError as e:
+        return {"ok": False, "error": f"Quiz file is invalid ({e}). Please generate the quiz again."}
     
-    questions = quiz_data.get("questions", [])
+    questions = quiz_data.questions
+    save_status = {"saved": False, "error": None}
+    quiz_topic = quiz_data.topic or topic
+    ensure_data_dirs()
     
-    with gr.Blocks(title=f"Quiz: {quiz_data.get('topic', topic)}") as demo:
-        gr.Markdown(f"# 📝 Quiz: {quiz_data.get('topic', topic)}")
+    with gr.Blocks(title=f"Quiz: {quiz_topic}") as demo:
+        gr.Markdown(f"# 📝 Quiz: {quiz_topic}")
+        gr.Markdown("Type the letter of your answer (A, B, C or D) in the **Answer** column.")
         
-        inputs = [gr.Radio(choices=q["options"], label=f"Q{i+1}: {q['question']}") for i, q in enumerate(questions)]
+        # One table instead of a Radio per question: a single component to
+        # render and a single value to send back on submit.
+        answer_table = gr.Dataframe(
+            headers=["#", "Question", "Options", "Answer"],
+            datatype=["number", "str", "str", "str"],
+            value=[[i + 1, q.question, "\n".join(q.options), ""] for i, q in enumerate(questions)],
+            col_count=(4, "fixed"),
+            row_count=(len(questions), "fixed"),
+            static_columns=[0, 1, 2],
+            interactive=True,
+            wrap=True,
+            type="array",
+        )
         submit_btn = gr.Button("Submit & Close", variant="primary")
         output_msg = gr.Textbox(label="Status", interactive=False)
         
-        def save_and_close(*user_answers):
-            results = [
-                {"question_id": i + 1, "question": questions[i]["question"], "selected_option": ans or "No Answer"}
-                for i, ans in enumerate(user_answers)
-            ]
-            output_path = RESPONSE_DIR / f"{clean_topic}_results.json"
-            with open(output_path, "w") as f:
-                json.dump({"topic": topic, "answers": results}, f, indent=2)
-            
-            # Schedule close after returning message
-            demo.close()
+        pending = set()  # keeps background tasks referenced until they finish
+        
+        async def _write_and_close(data):
+            try:
+                await asyncio.to_thread(json_utils.dump_file, data, output_path)
+                save_status["saved"] = True
+            except Exception as e:
+                save_status["error"] = str(e)
+                logger.error(f"[Tool: launch_quiz_interface] Failed to save responses: {e}")
+            finally:
+                # Always close, otherwise launch() below never returns. Use a
+                # plain thread: close() joins the server thread, whose loop
+                # teardown waits on the default executor, so closing from
+                # to_thread() would deadlock until the join times out.
+                await asyncio.sleep(0.1)
+                threading.Thread(target=demo.close, daemon=True).start()
+        
+        async def save_and_close(table):
+            results, unmatched = [], []
+            for i, (q, row) in enumerate(zip(questions, table)):
+                typed = str(row[3] or "").strip()
+                selected = _match_option(typed, q.options) if typed else "No Answer"
+                if selected is None:
+                    unmatched.append(f"Q{i + 1}")
+                results.append({"question_id": i + 1, "question": q.question, "selected_option": selected})
+            if unmatched:
+                # Don't save guesses: let the user correct them first
+                return f"⚠️ Couldn't match answers for {', '.join(unmatched)}. Use A, B, C, D or the option text."
+            # Write and close in the background so the status message paints
+            # immediately; close waits for the write so the file is complete
+            # by the time launch() returns.
+            task = asyncio.create_task(_write_and_close({"topic": topic, "answers": results}))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
             return "✅ Answers saved! Window closing..."
         
-        submit_btn.click(fn=save_and_close, inputs=inputs, outputs=output_msg)
+        submit_btn.click(fn=save_and_close, inputs=answer_table, outputs=output_msg)
     
     logger.info("[Tool: launch_quiz_interface] Launching Gradio interface...")
-    demo.launch(prevent_thread_lock=False, share=False)
-    return f"Quiz completed for '{topic}'. Responses saved."
\ No newline at end of file
+    # Single local user: small queue, no public API, minimal worker threads.
+    # Not quiet: the printed URL is the only way in when no browser opens.
+    demo.queue(max_size=4, api_open=False)
+    demo.launch(prevent_thread_lock=False, share=False, inbrowser=True,
+                server_name="127.0.0.1", max_threads=2)
+    if save_status["error"]:
+        return {"ok": False, "error": f"Could not save responses: {save_status['error']}"}
+    return {"ok": True, "topic": topic, "responses_saved": save_status["saved"]}
\ No newline at end of file
@@ -1,37 +1,40 @@
 """Tools for launching quiz review interface."""
 
-import json
 import logging
-from pathlib import Path
-import gradio as gr
+from concurrent.futures import ThreadPoolExecutor
 
-logger = logging.getLogger(__name__)
+from tools._quiz_cache import load_json, load_quiz
+from utils import json_utils
+from utils.paths import quiz_paths
+from utils.schemas import QuizError
 
-QUIZ_DIR = Path("data/quizzes")
-RESPONSE_DIR = Path("data/responses")
+logger = logging.getLogger(__name__)
 
 
-def review_quiz_interface(topic: str) -> str:
+def review_quiz_interface(topic: str) -> dict:
     """Launch chat interface to review quiz results."""
-    from utils.foundry_client import get_client
+    import gradio as gr
+    from utils.foundry_client import get_client, request_extra_body
     from agents.review_agent import ReviewAgent
     
-    clean_topic = topic.replace(' ', '_').lower()
-    quiz_file = QUIZ_DIR / f"{clean_topic}_quiz.json"
-    results_file = RESPONSE_DIR / f"{clean_topic}_results.json"
+    quiz_file, results_file = quiz_paths(topic)
     
     if not quiz_file.exists():
-        return f"Error: Quiz file for '{topic}' not found."
+        return {"ok": False, "error": f"Quiz file for '{topic}' not found."}
     if not results_file.exists():
-        return f"Error: No results found for '{topic}'. Please take the quiz first."
-    
-    with open(quiz_file, 'r') as f:
-        quiz_data = json.load(f)
-    with open(results_file, 'r') as f:
-        user_data = json.load(f)
+        return {"ok": False, "error": f"No results found for '{topic}'. Please take the quiz first."}
     
-    client, model_id = get_client()
-    reviewer = ReviewAgent(client, model_id, quiz_data, user_data)
+    # The two file loads and the client handshake are independent; overlap them
+    with ThreadPoolExecutor(3) as pool:
+        quiz_future = pool.submit(load_quiz, quiz_file)
+        user_future = pool.submit(load_json, results_file)
+        client_future = pool.submit(get_client)
+        client, model_id = client_future.result()
+        try:
+            quiz_data, user_data = quiz_future.result(), user_future.result()
+        except (json_utils.JSONDecodeError, QuizError) as e:
+            return {"ok": False, "error": f"Quiz or results file for '{topic}' is invalid ({e})."}
+    reviewer = ReviewAgent(client, model_id, quiz_data, user_data, extra_body=request_extra_body())
     initial_review = reviewer.run("Please provide my quiz review now.")
     
     with gr.Blocks(title=f"Review: {topic}") as demo:
@@ -46,10 +49,14 @@ def review_quiz_interface(topic: str) -> str:
         
         def respond(message: str, chat_history: list):
             if not message.strip():
-                return "", chat_history
+                yield "", chat_history
+                return
             chat_history.append({"role": "user", "content": message})
-            chat_history.append({"role": "assistant", "content": reviewer.run(message)})
-            return "", chat_history
+            chat_history.append({"role": "assistant", "content": ""})
+            # Render tokens as they arrive instead of waiting for the full reply
+            for delta in reviewer.run_stream(message):
+                chat_history[-1]["content"] += delta
+                yield "", chat_history
         
         def close_review():
             demo.close()
@@ -58,5 +65,9 @@ def review_quiz_interface(topic: str) -> str:
         submit_btn.click(respond, [msg, chatbot], [msg, chatbot])
         done_btn.click(close_review)
     
-    demo.launch(prevent_thread_lock=False, share=False)
-    return f"Review session completed for '{topic}'."
\ No newline at end of file
+    # Single local user: small queue, no public API, minimal worker threads.
+    # Not quiet: the printed URL is the only way in when no browser opens.
+    demo.queue(max_size=4, api_open=False)
+    demo.launch(prevent_thread_lock=False, share=False, inbrowser=True,
+                server_name="127.0.0.1", max_threads=2)
+    return {"ok": True, "topic": topic, "reviewed": True}
\ No newline at end of file
@@ -1,8 +1,12 @@
 """Foundry Client - Connect to Foundry Local or manual OpenAI-compatible server."""
 
+import functools
 import logging
 import re
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
 from openai import OpenAI
 
 logger = logging.getLogger(__name__)
@@ -15,27 +19,71 @@ except ImportError:
 
 DEFAULT_MODEL_ALIAS = "qwen3-0.6b-int4"
 
+# Ports Foundry Local commonly listens on, probed before shelling out to the CLI
+CANDIDATE_PORTS = (5272, 5273, 55000, 55001)
+
+# Extra request body asking the server to reuse the KV cache for an unchanged
+# prompt prefix. Switched on by `main.py --kv-reuse`.
+KV_REUSE_BODY = {"cache_prompt": True}
+kv_reuse_enabled = False
+
+
+def request_extra_body():
+    """Return the extra_body to send with chat requests, or None."""
+    return KV_REUSE_BODY if kv_reuse_enabled else None
+
+
+def _probe_port(http: httpx.Client, port: int):
+    """Return the endpoint if a Foundry service answers on this port."""
+    endpoint = f"http://localhost:{port}"
+    try:
+        if http.get(f"{endpoint}/openai/status").status_code == 200:
+            return endpoint
+    except httpx.HTTPError:
+        pass
+    return None
+
 
 def _discover_endpoint():
-    """Discover running Foundry service endpoint via CLI."""
-    result = subprocess.run(
-        ["foundry", "service", "status"],
-        capture_output=True, text=True, timeout=10
-    )
-    match = re.search(r"(http://\S+?)(?:/openai)?/status", result.stdout)
-    if not match:
-        raise ConnectionError(
-            "Foundry service is not running.\n"
-            f"Start it with: foundry model run {DEFAULT_MODEL_ALIAS}"
+    """Discover running Foundry service endpoint.
+
+    Probes Foundry's usual ports directly (in parallel), falling back to
+    parsing `foundry service status` when the service runs elsewhere.
+    Only reached through get_client(), whose cache makes this run once.
+    """
+    endpoint = None
+    with httpx.Client(timeout=0.5) as http, ThreadPoolExecutor(len(CANDIDATE_PORTS)) as pool:
+        for hit in pool.map(lambda port: _probe_port(http, port), CANDIDATE_PORTS):
+            if hit:
+                endpoint = hit
+                break
+
+    if endpoint is None:
+        result = subprocess.run(
+            ["foundry", "service", "status"],
+            capture_output=True, text=True, timeout=10
         )
-    return match.group(1)
+        match = re.search(r"(http://\S+?)(?:/openai)?/status", result.stdout)
+        if not match:
+            raise ConnectionError(
+                "Foundry service is not running.\n"
+                f"Start it with: foundry model run {DEFAULT_MODEL_ALIAS}"
+            )
+        endpoint = match.group(1)
+
+    return endpoint
 
 
+@functools.lru_cache(maxsize=1)
 def get_client():
     """Get OpenAI client and model ID.
 
     For catalog models: uses FoundryLocalManager (auto-starts service).
     For custom models: discovers the running service endpoint directly.
+
+    The result is cached for the life of the process, so the orchestrator and
+    every tool share one client and the service handshake runs only once.
+    Failures are not cached; the next call retries.
     """
     # Try FoundryLocalManager first (works for catalog models)
     if FOUNDRY_AVAILABLE:
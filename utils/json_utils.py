@@ -0,0 +1,47 @@
+"""JSON helpers - use orjson when installed, falling back to stdlib json."""
+
+import json
+from pathlib import Path
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can keep
+# catching the stdlib exception either way.
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data):
+    """Parse JSON from str or bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj) -> str:
+    """Serialize obj to a compact JSON string."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def to_str(value) -> str:
+    """Return strings unchanged; serialize anything else to JSON once."""
+    return value if type(value) is str else dumps(value)
+
+
+def load_file(path):
+    """Read and parse a JSON file (read as bytes, no text decode pass)."""
+    return loads(Path(path).read_bytes())
+
+
+def dump_file(obj, path):
+    """Write obj to path as 2-space indented JSON."""
+    if ORJSON_AVAILABLE:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(obj, indent=2).encode()
+    Path(path).write_bytes(data)
@@ -0,0 +1,26 @@
+"""Data file locations shared by the quiz tools."""
+
+import functools
+from pathlib import Path
+from typing import Tuple
+
+QUIZ_DIR = Path("data/quizzes")
+RESPONSE_DIR = Path("data/responses")
+
+_dirs_ready = False
+
+
+def ensure_data_dirs():
+    """Create the data directories on first use rather than at import."""
+    global _dirs_ready
+    if not _dirs_ready:
+        QUIZ_DIR.mkdir(parents=True, exist_ok=True)
+        RESPONSE_DIR.mkdir(parents=True, exist_ok=True)
+        _dirs_ready = True
+
+
+@functools.lru_cache(maxsize=256)
+def quiz_paths(topic: str) -> Tuple[Path, Path]:
+    """Return (quiz file, results file) for a topic."""
+    clean_topic = topic.replace(' ', '_').lower()
+    return QUIZ_DIR / f"{clean_topic}_quiz.json", RESPONSE_DIR / f"{clean_topic}_results.json"
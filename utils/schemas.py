@@ -0,0 +1,37 @@
+"""Typed quiz file schema, validated on decode with msgspec."""
+
+from typing import Annotated, List
+
+import msgspec
+from msgspec import Meta
+
+
+class Question(msgspec.Struct):
+    question: str
+    options: Annotated[List[str], Meta(min_length=4, max_length=4)]
+    correct: Annotated[str, Meta(pattern="^[A-D]$")]
+
+
+class Quiz(msgspec.Struct, kw_only=True):
+    topic: str = ""
+    questions: Annotated[List[Question], Meta(min_length=1)]
+
+
+# Raised for malformed JSON and schema mismatches (ValidationError subclasses it)
+QuizError = msgspec.DecodeError
+
+_quiz_decoder = msgspec.json.Decoder(Quiz)
+
+
+def decode_quiz(data: bytes) -> Quiz:
+    """Decode and validate quiz JSON.
+
+    Raises msgspec.DecodeError for invalid JSON and its subclass
+    msgspec.ValidationError for a schema mismatch.
+    """
+    return _quiz_decoder.decode(data)
+
+
+def validate_quiz(data: dict) -> Quiz:
+    """Validate an already-parsed quiz dict (raises msgspec.ValidationError)."""
+    return msgspec.convert(data, Quiz)